@@ -1,26 +1,15 @@
-import feedparser
-import random
-import requests
+import asyncio
 import os
-import json
 import logging
-from datetime import datetime
 from requests_oauthlib import OAuth1Session
+from feedbot.core import BaseBot, setup_logging
+from feedbot.ratelimit import retrying_adapter
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/feed_bot.log'),
-        logging.StreamHandler()
-    ]
-)
-
-class RssTweetBot:
+class RssTweetBot(BaseBot):
     def __init__(self):
+        super().__init__()
         self.xai_api_key = os.environ["XAI_API_KEY"]
-        
+
         # Initialize OAuth session for Twitter
         self.oauth = OAuth1Session(
             os.getenv("OAUTH_CONSUMER_KEY"),
@@ -28,65 +17,11 @@ class RssTweetBot:
             resource_owner_key=os.getenv("OAUTH_ACCESS_TOKEN"),
             resource_owner_secret=os.getenv("OAUTH_ACCESS_TOKEN_SECRET")
         )
-        
-        # Load posted articles history
-        self.history_file = 'logs/posted_articles.json'
-        self.posted_articles = self.load_history()
-
-    def load_history(self):
-        """Load history of posted articles."""
-        if os.path.exists(self.history_file):
-            with open(self.history_file, 'r') as f:
-                return json.load(f)
-        return []
-
-    def save_history(self, article_url):
-        """Save posted article to history."""
-        self.posted_articles.append({
-            'url': article_url,
-            'date': datetime.now().isoformat()
-        })
-        
-        # Ensure the logs directory exists
-        os.makedirs('logs', exist_ok=True)
-        
-        with open(self.history_file, 'w') as f:
-            json.dump(self.posted_articles, f, indent=2)
-
-    def get_random_feed_url(self, file_path):
-        """Read RSS feed URLs from file and select a random one."""
-        with open(file_path, 'r') as f:
-            feeds = f.read().splitlines()
-            # Filter out empty lines and comments, then get only the URL part before '!'
-            valid_feeds = []
-            for line in feeds:
-                if line and not line.startswith('#'):
-                    url = line.split('!')[0].strip()
-                    valid_feeds.append(url)
-            return random.choice(valid_feeds)
-
-    def get_latest_article(self, feed_url):
-        """Get the latest article from the RSS feed."""
-        feed = feedparser.parse(feed_url)
-        if not feed.entries:
-            raise Exception(f"No entries found in feed: {feed_url}")
-        
-        # Get first article that hasn't been posted
-        for entry in feed.entries:
-            if not any(post['url'] == entry.link for post in self.posted_articles):
-                article = {
-                    'title': entry.title,
-                    'link': entry.link,
-                    'description': entry.get('description', ''),
-                    'content': entry.get('content', [{'value': ''}])[0]['value']
-                }
-                return article
-                
-        raise Exception(f"No new articles found in feed: {feed_url}")
+        self.oauth.mount('https://', retrying_adapter())
 
     def generate_tweet(self, article):
         """Generate tweet using XAI API (Grok)."""
-        response = requests.post(
+        response = self.session.post(
             "https://api.x.ai/v1/chat/completions",
             headers={
                 "Authorization": f"Bearer {self.xai_api_key}",
@@ -134,15 +69,17 @@ class RssTweetBot:
         return response.json()
 
 def main():
+    setup_logging()
+
     try:
         bot = RssTweetBot()
         
-        # Get random RSS feed
-        feed_url = bot.get_random_feed_url('rss_feeds.txt')
-        logging.info(f"Selected feed: {feed_url}")
+        # Get a random batch of RSS feeds
+        feed_urls = bot.get_random_feed_urls()
+        logging.info(f"Selected {len(feed_urls)} feeds")
         
         # Get latest article
-        article = bot.get_latest_article(feed_url)
+        article = asyncio.run(bot.get_latest_article(feed_urls))
         logging.info(f"Found article: {article['title']}")
         
         # Generate tweet
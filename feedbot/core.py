@@ -0,0 +1,484 @@
+import abc
+import asyncio
+import atexit
+import aiohttp
+import feedparser
+import random
+import requests
+import os
+import json
+import logging
+import multiprocessing
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from lxml import etree
+from feedbot import feedcache, xmlfeed
+from feedbot.preprocess import content_key
+from feedbot.ratelimit import RETRY_STATUSES, RateLimiter, retrying_adapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# NamedTemporaryFile creates files as 0600; give replacements the mode open() would
+_umask = os.umask(0)
+os.umask(_umask)
+_FILE_MODE = 0o666 & ~_umask
+
+def json_dumps(obj, indent=False):
+    """Serialize obj to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+def json_loads(data):
+    """Parse JSON from str or bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def setup_logging():
+    """Log to the console and to logs/feed_bot.log."""
+    os.makedirs('logs', exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('logs/feed_bot.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+def iso(ts):
+    """Format a history timestamp in nanoseconds since the epoch as UTC ISO 8601."""
+    return datetime.fromtimestamp(ts / 1e9, tz=timezone.utc).isoformat()
+
+def migrate_history(json_file, jsonl_file):
+    """Convert a JSON list history file into an append-only JSON Lines file."""
+    with open(json_file, 'rb') as f:
+        posted_articles = json_loads(f.read())
+
+    # Both bots may migrate at start-up, so each writes its own temp file
+    directory = os.path.dirname(jsonl_file) or '.'
+    with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False) as f:
+        for post in posted_articles:
+            f.write(json_dumps(post) + b'\n')
+    os.chmod(f.name, _FILE_MODE)
+
+    try:
+        # Unlike os.replace, linking fails if the other bot finished first
+        # and may already be appending to the file
+        os.link(f.name, jsonl_file)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(f.name)
+
+def parse_feed(body, response_headers):
+    """Parse downloaded feed bytes into a FeedParserDict that can be pickled."""
+    # lxml handles well-formed RSS and Atom far faster than feedparser
+    try:
+        return xmlfeed.parse(body, response_headers.get('content-location', ''))
+    except (etree.LxmlError, ValueError):
+        pass
+
+    feed = feedparser.parse(body, response_headers=response_headers)
+    # Parser errors keep a reference to the closed input stream
+    if feed.get('bozo_exception') is not None:
+        feed['bozo_exception'] = Exception(str(feed['bozo_exception']))
+    return feed
+
+def write_json_atomic(path, obj):
+    """Write obj as indented JSON through a temp file so readers never see a partial file."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    f = tempfile.NamedTemporaryFile('wb', dir=directory, delete=False)
+    try:
+        with f:
+            f.write(json_dumps(obj, indent=True))
+        os.chmod(f.name, _FILE_MODE)
+        os.replace(f.name, path)
+    except BaseException:
+        # Don't leave stray temp files in logs/
+        os.remove(f.name)
+        raise
+
+class NoNewArticlesError(Exception):
+    """Raised when none of the checked feeds has an unposted article."""
+
+class BaseBot:
+    """Shared feed selection, fetching and history for every posting bot."""
+
+    def __init__(self):
+        # Reuse pooled connections for API and webhook calls, with at most
+        # four per host and back-off when a host rate limits us
+        self.session = requests.Session()
+        adapter = retrying_adapter()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # The same limits for the aiohttp requests
+        self.limiter = RateLimiter()
+
+        # Keep-alive session for chat completions, opened inside the event loop
+        self._chat_session = None
+
+        # Recent summaries by article content, so syndicated copies reuse them
+        self._summaries = OrderedDict()
+        self.max_summaries = 256
+
+        # Load posted articles history
+        self.history_file = 'logs/posted_articles.jsonl'
+        self.legacy_history_file = 'logs/posted_articles.json'
+        self._posted_urls = self.load_history()
+
+        # Links being posted right now, which a prefetching poll must skip
+        self._in_flight = set()
+
+        # Load conditional GET validators for feeds without new articles
+        self.feed_cache_file = 'logs/feed_cache.json'
+        self.feed_cache = self.load_feed_cache()
+
+        # Seconds a parsed feed is shared with the other bot processes
+        self.feed_cache_ttl = 300
+
+        # Tries per feed download when the server is busy or unreachable
+        self.fetch_attempts = 3
+
+        # Batches larger than this are parsed in a process pool
+        self.process_parse_threshold = 8
+        self._parse_pool = None
+
+        # Load per-feed [hits, misses] used to favour feeds with new content
+        self.feed_stats_file = 'logs/feed_stats.json'
+        self._feed_stats = self.load_feed_stats()
+
+        # Load the feed list once rather than on every pick
+        self.feeds_file = 'rss_feeds.txt'
+        self._feeds = self._load_feeds(self.feeds_file)
+
+    def read_history(self):
+        """Stream posted article records from the history file.
+
+        Records carry either a 'ts' in nanoseconds (format it with iso()) or,
+        for older entries, a local-time 'date' string.
+        """
+        with open(self.history_file, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield json_loads(line)
+
+    def load_history(self):
+        """Load the URLs of posted articles."""
+        if not os.path.exists(self.history_file) and os.path.exists(self.legacy_history_file):
+            migrate_history(self.legacy_history_file, self.history_file)
+            logging.info(f"Migrated {self.legacy_history_file} to {self.history_file}")
+
+        if not os.path.exists(self.history_file):
+            return set()
+        return {post['url'] for post in self.read_history()}
+
+    def save_history(self, article_url):
+        """Append posted article to history."""
+        self._posted_urls.add(article_url)
+        
+        # Ensure the logs directory exists
+        os.makedirs('logs', exist_ok=True)
+        
+        # An integer timestamp is cheaper to produce and smaller on disk
+        record = {'url': article_url, 'ts': time.time_ns()}
+        with open(self.history_file, 'ab') as f:
+            f.write(json_dumps(record) + b'\n')
+
+    def load_feed_cache(self):
+        """Load the ETag/Last-Modified validators of previously fetched feeds."""
+        if os.path.exists(self.feed_cache_file):
+            with open(self.feed_cache_file, 'rb') as f:
+                return json_loads(f.read())
+        return {}
+
+    def save_feed_cache(self):
+        """Atomically save the feed validators."""
+        write_json_atomic(self.feed_cache_file, self.feed_cache)
+
+    def cache_feed_validators(self, feed_url, feed):
+        """Remember a feed's validators so unchanged feeds can be skipped."""
+        etag = feed.get('etag')
+        modified = feed.get('modified')
+        if etag or modified:
+            self.feed_cache[feed_url] = {'etag': etag, 'modified': modified}
+
+    def load_feed_stats(self):
+        """Load how often each feed had a new article when checked."""
+        if os.path.exists(self.feed_stats_file):
+            with open(self.feed_stats_file, 'rb') as f:
+                return json_loads(f.read())
+        return {}
+
+    def save_feed_stats(self):
+        """Atomically save the per-feed hit and miss counts."""
+        write_json_atomic(self.feed_stats_file, self._feed_stats)
+
+    def record_feed_result(self, feed_url, found_article):
+        """Count whether a freshly downloaded feed had a new article."""
+        stats = self._feed_stats.setdefault(feed_url, [0, 0])
+        stats[0 if found_article else 1] += 1
+
+    def feed_weight(self, feed_url):
+        """Estimate the chance that a feed has a new article."""
+        hits, misses = self._feed_stats.get(feed_url, (0, 0))
+        # Unseen feeds start at 0.5, and no feed drops below 0.1
+        return max(0.1, (hits + 1) / (hits + misses + 2))
+
+    def _load_feeds(self, file_path):
+        """Read RSS feed URLs from file, skipping empty lines and comments."""
+        self._feeds_mtime = os.stat(file_path).st_mtime
+        valid_feeds = []
+        with open(file_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    # Split on first whitespace and take only the URL part
+                    valid_feeds.append(line.split()[0])
+        return tuple(valid_feeds)
+
+    def get_random_feed_urls(self, count=8):
+        """Select a random sample of RSS feed URLs."""
+        # Pick up edits to the feed list without restarting the bot
+        if os.stat(self.feeds_file).st_mtime != self._feeds_mtime:
+            self._feeds = self._load_feeds(self.feeds_file)
+        # Weighted sample without replacement (Efraimidis-Spirakis keys)
+        feeds = sorted(
+            self._feeds,
+            key=lambda url: random.random() ** (1 / self.feed_weight(url)),
+            reverse=True
+        )
+        return feeds[:count]
+
+    def _get_parse_pool(self):
+        """Start the feed parsing processes on first use."""
+        if self._parse_pool is None:
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context('forkserver')
+            )
+            atexit.register(self._parse_pool.shutdown)
+        return self._parse_pool
+
+    async def fetch_feeds(self, feed_urls):
+        """Download RSS feeds concurrently and parse them off the event loop."""
+        loop = asyncio.get_running_loop()
+
+        # Parsing is CPU-bound, so large batches are spread over processes to
+        # get around the GIL. Small batches and machines with two cores or
+        # fewer parse in a thread, where the process start-up would outweigh it.
+        executor = None
+        if len(feed_urls) > self.process_parse_threshold and (os.cpu_count() or 1) > 2:
+            executor = self._get_parse_pool()
+        timeout = aiohttp.ClientTimeout(total=10)
+        connector = aiohttp.TCPConnector(limit_per_host=4, limit=64)
+
+        async def fetch(session, feed_url):
+            # Another bot may have parsed this feed moments ago
+            feed = feedcache.load_feed(feed_url, self.feed_cache_ttl)
+            if feed is not None:
+                feed['from_cache'] = True
+                return feed
+
+            cached = self.feed_cache.get(feed_url, {})
+            headers = {}
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('modified'):
+                headers['If-Modified-Since'] = cached['modified']
+
+            for attempt in range(self.fetch_attempts):
+                try:
+                    # Skip a rate limited feed host rather than stall the whole poll
+                    async with self.limiter.limit(feed_url, wait=False), \
+                            session.get(feed_url, headers=headers, timeout=timeout) as response:
+                        self.limiter.update(feed_url, response.headers)
+                        if response.status == 304:
+                            return None
+                        if response.status not in RETRY_STATUSES:
+                            body = await response.read()
+                            # feedparser expects lower-case header names
+                            response_headers = {k.lower(): v for k, v in response.headers.items()}
+                            response_headers.setdefault('content-location', str(response.url))
+                            break
+                        error = Exception(f"HTTP {response.status} from {feed_url}")
+                except aiohttp.ClientConnectionError as e:
+                    error = e
+
+                # A retry could only fail with HostPausedError, so give up now
+                if attempt == self.fetch_attempts - 1 or self.limiter.paused(feed_url):
+                    raise error
+                await self.limiter.backoff(attempt)
+
+            # Parse the downloaded bytes so feedparser never re-fetches the URL;
+            # the headers give it the charset and the base for relative links.
+            feed = await loop.run_in_executor(executor, parse_feed, body, response_headers)
+            feed['etag'] = response_headers.get('etag')
+            feed['modified'] = response_headers.get('last-modified')
+            feedcache.store_feed(feed_url, feed)
+            return feed
+
+        async with aiohttp.ClientSession(connector=connector) as session:
+            feeds = await asyncio.gather(
+                *[fetch(session, feed_url) for feed_url in feed_urls],
+                return_exceptions=True
+            )
+        return list(zip(feed_urls, feeds))
+
+    async def get_latest_article(self, feed_urls):
+        """Get the latest unposted article from a batch of RSS feeds."""
+        try:
+            for feed_url, feed in await self.fetch_feeds(feed_urls):
+                if isinstance(feed, Exception):
+                    logging.warning(f"Error fetching feed {feed_url}: {feed!r}")
+                elif feed is None:
+                    logging.info(f"Feed not modified: {feed_url}")
+                elif not feed.entries:
+                    logging.warning(f"No entries found in feed: {feed_url}")
+                else:
+                    # Only a fresh download says anything new about the feed
+                    fresh = not feed.get('from_cache')
+
+                    # Get first article that hasn't been posted
+                    for entry in feed.entries:
+                        # Only the link is needed to rule an entry out
+                        link = entry.get('link')
+                        if not link or link in self._posted_urls or link in self._in_flight:
+                            continue
+
+                        if fresh:
+                            self.record_feed_result(feed_url, True)
+                        return {
+                            'title': entry.get('title', link),
+                            'link': link,
+                            'description': entry.get('description', ''),
+                            'content': (entry.get('content') or [{'value': ''}])[0]['value'],
+                            'author': entry.get('author', 'Unknown Author'),
+                            'published': entry.get('published', datetime.now().isoformat())
+                        }
+
+                    # Nothing new here, so skip downloading it until it changes
+                    self.cache_feed_validators(feed_url, feed)
+                    if fresh:
+                        self.record_feed_result(feed_url, False)
+
+            raise NoNewArticlesError(f"No new articles found in {len(feed_urls)} feeds")
+        finally:
+            self.save_feed_cache()
+            self.save_feed_stats()
+
+    async def summarize_once(self, title, content, summarize):
+        """Return the summary of an identical recent article, or await
+        summarize(title, content) and remember its result."""
+        # The same story is often syndicated under several URLs
+        key = content_key(title, content)
+        if key in self._summaries:
+            logging.info("Reusing summary of an identical article")
+            self._summaries.move_to_end(key)
+            return self._summaries[key]
+
+        summary = await summarize(title, content)
+        self._summaries[key] = summary
+        if len(self._summaries) > self.max_summaries:
+            self._summaries.popitem(last=False)
+        return summary
+
+    async def stream_chat_completion(self, url, headers, payload):
+        """Stream an OpenAI-style chat completion and return its full text."""
+        if self._chat_session is None or self._chat_session.closed:
+            self._chat_session = aiohttp.ClientSession()
+        session = self._chat_session
+
+        for attempt in range(self.limiter.max_attempts):
+            async with self.limiter.limit(url), \
+                    session.post(url, headers=headers, json={**payload, "stream": True}) as response:
+                self.limiter.update(url, response.headers)
+                if response.status == 200:
+                    return await self._read_completion_stream(response)
+                if response.status not in RETRY_STATUSES or attempt == self.limiter.max_attempts - 1:
+                    raise Exception(f"Chat API error: {await response.text()}")
+            await self.limiter.backoff(attempt)
+
+    async def _read_completion_stream(self, response):
+        """Join the token deltas of a streamed chat completion."""
+        chunks = []
+        # Server-sent events: one "data: {...}" line per token delta
+        async for line in response.content:
+            line = line.decode('utf-8').strip()
+            if not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                break
+            event = json_loads(data)
+            if event.get('error'):
+                raise Exception(f"Chat API error: {event['error']}")
+            # Usage and keep-alive chunks can arrive with no choices
+            choices = event.get('choices') or []
+            if choices:
+                delta = choices[0].get('delta') or {}
+                chunks.append(delta.get('content') or '')
+        return ''.join(chunks).strip()
+
+class PollingBot(BaseBot, abc.ABC):
+    """A bot that keeps running, posting new articles as the feeds produce them."""
+
+    async def poll_feeds(self):
+        """Check every feed and return the first unposted article, if any."""
+        feed_urls = self.get_random_feed_urls(len(self._feeds))
+        logging.info(f"Polling {len(feed_urls)} feeds")
+        try:
+            return await self.get_latest_article(feed_urls)
+        except NoNewArticlesError as e:
+            logging.info(str(e))
+            return None
+
+    @abc.abstractmethod
+    async def handle_article(self, article):
+        """Generate and publish a post for an article."""
+
+    async def run(self, interval, max_interval=3600):
+        """Post new articles as they appear, backing off while feeds are quiet."""
+        delay = interval
+        next_poll = None
+        try:
+            while True:
+                try:
+                    # Clear the prefetch first so a failed one is not awaited again
+                    poll, next_poll = next_poll or self.poll_feeds(), None
+                    article = await poll
+
+                    if article:
+                        logging.info(f"Found article: {article['title']}")
+                        # Look for the next article while this one is summarized
+                        self._in_flight.add(article['link'])
+                        next_poll = asyncio.create_task(self.poll_feeds())
+                        try:
+                            await self.handle_article(article)
+                        finally:
+                            self._in_flight.discard(article['link'])
+                        delay = interval
+                    else:
+                        delay = min(delay * 2, max_interval)
+                except Exception as e:
+                    logging.error(f"Error in main loop: {str(e)}")
+                    if next_poll is not None:
+                        next_poll.cancel()
+                        next_poll = None
+                    # Back off instead of hammering a failing API
+                    delay = min(delay * 2, max_interval)
+
+                logging.info(f"Sleeping for {delay} seconds...")
+                await asyncio.sleep(delay)
+        finally:
+            if self._chat_session is not None:
+                await self._chat_session.close()
@@ -0,0 +1,38 @@
+import fcntl
+import hashlib
+import logging
+import os
+import pickle
+import time
+
+CACHE_DIR = 'logs/feedcache'
+
+def _cache_path(feed_url):
+    return os.path.join(CACHE_DIR, hashlib.sha1(feed_url.encode()).hexdigest())
+
+def load_feed(feed_url, ttl=300):
+    """Return the cached parse of a feed if it is younger than ttl seconds."""
+    path = _cache_path(feed_url)
+    try:
+        if os.path.getmtime(path) < time.time() - ttl:
+            return None
+        with open(path, 'rb') as f:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+def store_feed(feed_url, feed):
+    """Cache a parsed feed so the other bot processes can reuse it."""
+    try:
+        data = pickle.dumps(feed)
+    except (pickle.PicklingError, TypeError, AttributeError, ValueError) as e:
+        logging.warning(f"Could not cache feed {feed_url}: {e!r}")
+        return
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Truncate under the lock so readers never see a half-written pickle
+    with open(_cache_path(feed_url), 'ab') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.truncate(0)
+        f.write(data)
@@ -0,0 +1,75 @@
+import hashlib
+import logging
+import re
+import lxml.html
+from lxml import etree
+from lxml.etree import ParserError
+from lxml.html.defs import block_tags, list_tags, table_tags
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+_encoding = None
+
+_XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+# Elements whose text reads as a separate line rather than running on
+_BREAK_TAGS = block_tags | list_tags | table_tags | {'br'}
+
+_CODE_TAGS = ('script', 'style', 'noscript')
+
+def _get_encoding():
+    """Return the tiktoken encoding, or None to fall back to counting characters."""
+    global _encoding
+    if _encoding is None:
+        _encoding = False
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.get_encoding('cl100k_base')
+            except Exception as e:
+                # tiktoken downloads the encoding on first use
+                logging.warning(f"Could not load tiktoken encoding: {e!r}")
+    return _encoding or None
+
+def strip_html(text):
+    """Return the visible text of an HTML fragment."""
+    # lxml rejects str input that declares its own encoding
+    text = _XML_DECLARATION.sub('', text)
+    try:
+        root = lxml.html.fromstring(text)
+    except ParserError:
+        # lxml refuses empty or whitespace-only documents
+        return ''
+
+    # Script and style bodies are code, not article text
+    etree.strip_elements(root, *_CODE_TAGS, with_tail=False)
+
+    # Space out block elements so adjacent paragraphs and list items don't
+    # run together; clean_and_truncate collapses the extra whitespace
+    for element in root.iter(*_BREAK_TAGS):
+        element.text = ' ' + (element.text or '')
+        element.tail = ' ' + (element.tail or '')
+    return ''.join(root.itertext())
+
+def clean_and_truncate(text, max_tokens=256):
+    """Strip markup and whitespace from text and cap it at max_tokens."""
+    text = re.sub(r'\s+', ' ', strip_html(text)).strip()
+
+    encoding = _get_encoding()
+    if encoding is None:
+        # Assume roughly four characters per token
+        max_chars = max_tokens * 4
+        if len(text) <= max_chars:
+            return text
+        return text[:max_chars] + '...'
+
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens]) + '...'
+
+def content_key(title, content):
+    """Key an article by its title and opening text to spot duplicates."""
+    return hashlib.sha1(f"{title}\n{content[:200]}".encode()).hexdigest()
@@ -0,0 +1,107 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Statuses that mean "slow down / try again later" rather than a real failure
+RETRY_STATUSES = (429, 503)
+
+def retrying_adapter(max_per_host=4, max_attempts=5):
+    """Build a requests adapter that caps connections per host and retries
+    rate-limited responses with exponential back-off, honouring Retry-After."""
+    retry = Retry(
+        total=max_attempts - 1,
+        # A read error on a POST may come after the host accepted it, and
+        # sending it again would post twice
+        read=0,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=None,
+        backoff_factor=1,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    return HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=max_per_host,
+        pool_block=True,
+        max_retries=retry
+    )
+
+def _seconds_until_reset(headers):
+    """Work out how long a host asked us to wait, if at all."""
+    retry_after = headers.get('Retry-After')
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            try:
+                return parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+
+    remaining = headers.get('X-RateLimit-Remaining') or headers.get('X-Rate-Limit-Remaining')
+    reset = headers.get('X-RateLimit-Reset') or headers.get('X-Rate-Limit-Reset')
+    if remaining == '0' and reset:
+        try:
+            reset = float(reset)
+        except ValueError:
+            return None
+        # Some APIs send an epoch timestamp, others a number of seconds
+        return reset - time.time() if reset > 1e9 else reset
+    return None
+
+class HostPausedError(Exception):
+    """Raised instead of waiting when a host has paused us."""
+
+class RateLimiter:
+    """Per-host concurrency cap plus the rate limits each host reports.
+
+    Every host gets a semaphore of max_per_host slots. When a response says
+    the host's quota is spent (Retry-After, or X-RateLimit-Remaining of 0),
+    the host is paused until it resets, for at most max_pause seconds, and
+    queued requests either wait it out or fail with HostPausedError.
+    """
+
+    def __init__(self, max_per_host=4, max_attempts=5, max_pause=60):
+        self.max_per_host = max_per_host
+        self.max_attempts = max_attempts
+        self.max_pause = max_pause
+        self._semaphores = {}
+        self._resume_at = {}
+
+    @asynccontextmanager
+    async def limit(self, url, wait=True):
+        """Hold one of the host's request slots, waiting out any pause.
+
+        With wait=False a paused host raises HostPausedError at once.
+        """
+        host = urlsplit(url).hostname
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        async with semaphore:
+            delay = self._resume_at.get(host, 0) - time.monotonic()
+            if delay > 0:
+                if not wait:
+                    raise HostPausedError(f"{host} is rate limited for another {delay:.0f}s")
+                await asyncio.sleep(delay)
+            yield
+
+    def paused(self, url):
+        """Whether the host has asked us to hold off for now."""
+        return self._resume_at.get(urlsplit(url).hostname, 0) > time.monotonic()
+
+    def update(self, url, headers):
+        """Pause the host if its response says it is rate limited."""
+        delay = _seconds_until_reset(headers)
+        if delay and delay > 0:
+            host = urlsplit(url).hostname
+            # Don't let one host stall the bot for as long as it likes
+            resume_at = time.monotonic() + min(delay, self.max_pause)
+            self._resume_at[host] = max(self._resume_at.get(host, 0), resume_at)
+
+    async def backoff(self, attempt):
+        """Sleep 2**attempt seconds plus jitter before the next try."""
+        await asyncio.sleep(2 ** attempt + random.random())
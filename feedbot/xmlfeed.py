@@ -0,0 +1,88 @@
+from urllib.parse import urljoin
+from feedparser import FeedParserDict
+from lxml import etree
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+RSS1 = '{http://purl.org/rss/1.0/}'
+RDF = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}'
+CONTENT = '{http://purl.org/rss/1.0/modules/content/}'
+DC = '{http://purl.org/dc/elements/1.1/}'
+MEDIA = '{http://search.yahoo.com/mrss/}'
+
+class UnsupportedFeedError(ValueError):
+    """Raised for documents that are not plain RSS 2.0, RSS 1.0 or Atom."""
+
+def _text(element, *paths):
+    """Return the stripped text of the first path that has any.
+
+    Raises UnsupportedFeedError when the field holds markup or unresolved
+    entities, which .text would silently cut short.
+    """
+    for path in paths:
+        child = element.find(path)
+        if child is not None and len(child):
+            raise UnsupportedFeedError(f"Mixed content in <{child.tag}>")
+        if child is not None and child.text and child.text.strip():
+            return child.text.strip()
+    return None
+
+def _entry(**fields):
+    """Build an entry, leaving out missing fields so .get() defaults apply."""
+    entry = FeedParserDict()
+    for key, value in fields.items():
+        if value:
+            entry[key] = value
+    return entry
+
+def _rss_entry(item, ns, base_url):
+    link = _text(item, ns + 'link')
+    if not link:
+        guid = item.find('guid')
+        if guid is not None and guid.get('isPermaLink', 'true') != 'false':
+            link = _text(item, 'guid')
+    content = _text(item, CONTENT + 'encoded')
+    return _entry(
+        title=_text(item, ns + 'title'),
+        link=urljoin(base_url, link) if link else None,
+        description=_text(item, ns + 'description'),
+        content=[{'value': content}] if content else None,
+        author=_text(item, 'author', DC + 'creator'),
+        published=_text(item, 'pubDate', DC + 'date')
+    )
+
+def _atom_entry(entry, base_url):
+    link = None
+    for candidate in entry.findall(ATOM + 'link'):
+        if candidate.get('rel', 'alternate') == 'alternate' and candidate.get('href'):
+            link = candidate.get('href')
+            break
+    content = _text(entry, ATOM + 'content')
+    return _entry(
+        title=_text(entry, ATOM + 'title'),
+        link=urljoin(base_url, link) if link else None,
+        description=_text(entry, ATOM + 'summary', f'{MEDIA}group/{MEDIA}description'),
+        content=[{'value': content}] if content else None,
+        author=_text(entry, f'{ATOM}author/{ATOM}name'),
+        published=_text(entry, ATOM + 'published', ATOM + 'updated')
+    )
+
+def parse(body, base_url=''):
+    """Extract the entry fields the bots use from RSS or Atom bytes.
+
+    Raises lxml.etree.XMLSyntaxError for malformed XML and
+    UnsupportedFeedError for other formats, so callers can fall back to
+    feedparser.
+    """
+    parser = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=False)
+    root = etree.fromstring(body, parser)
+
+    if root.tag == 'rss':
+        entries = [_rss_entry(item, '', base_url) for item in root.iterfind('channel/item')]
+    elif root.tag == ATOM + 'feed':
+        entries = [_atom_entry(entry, base_url) for entry in root.iterfind(ATOM + 'entry')]
+    elif root.tag == RDF + 'RDF':
+        entries = [_rss_entry(item, RSS1, base_url) for item in root.iterfind(RSS1 + 'item')]
+    else:
+        raise UnsupportedFeedError(f"Unsupported feed root: {root.tag}")
+
+    return FeedParserDict(bozo=False, entries=entries, feed=FeedParserDict(), headers={})
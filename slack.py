@@ -1,102 +1,32 @@
-import feedparser
-import random
-import requests
-import os
-import json
+import asyncio
 import logging
-from datetime import datetime
-import time
 import vars
+from feedbot.core import PollingBot, setup_logging
+from feedbot.preprocess import clean_and_truncate
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/feed_bot.log'),
-        logging.StreamHandler()
-    ]
-)
-
-class RssSlackBot:
+class RssSlackBot(PollingBot):
     def __init__(self):
+        super().__init__()
         self.webhook_url = vars.SLACK_WEBHOOK_URL
         self.ollama_api_key = vars.OLLAMA_API_KEY
         self.bot_name = "RSS Feed Bot"
         self.bot_icon = ":newspaper:"  # You can customize this emoji
-        
-        # Load posted articles history
-        self.history_file = 'logs/posted_articles.json'
-        self.posted_articles = self.load_history()
-
-    def load_history(self):
-        """Load history of posted articles."""
-        if os.path.exists(self.history_file):
-            with open(self.history_file, 'r') as f:
-                return json.load(f)
-        return []
-
-    def save_history(self, article_url):
-        """Save posted article to history."""
-        self.posted_articles.append({
-            'url': article_url,
-            'date': datetime.now().isoformat()
-        })
-        
-        # Ensure the logs directory exists
-        os.makedirs('logs', exist_ok=True)
-        
-        with open(self.history_file, 'w') as f:
-            json.dump(self.posted_articles, f, indent=2)
 
-    def get_random_feed_url(self, file_path):
-        """Read RSS feed URLs from file and select a random one."""
-        with open(file_path, 'r') as f:
-            feeds = f.read().splitlines()
-            # Filter out empty lines and comments
-            valid_feeds = []
-            for line in feeds:
-                if line and not line.startswith('#'):
-                    # Split on first whitespace and take only the URL part
-                    url = line.split()[0].strip()
-                    valid_feeds.append(url)
-            return random.choice(valid_feeds)
-
-    def get_latest_article(self, feed_url):
-        """Get the latest article from the RSS feed."""
-        feed = feedparser.parse(feed_url)
-        if not feed.entries:
-            raise Exception(f"No entries found in feed: {feed_url}")
-        
-        # Get first article that hasn't been posted
-        for entry in feed.entries:
-            if not any(post['url'] == entry.link for post in self.posted_articles):
-                article = {
-                    'title': entry.title,
-                    'link': entry.link,
-                    'description': entry.get('description', ''),
-                    'content': entry.get('content', [{'value': ''}])[0]['value'],
-                    'author': entry.get('author', 'Unknown Author'),
-                    'published': entry.get('published', datetime.now().isoformat())
-                }
-                return article
-                
-        raise Exception(f"No new articles found in feed: {feed_url}")
-
-    def generate_summary(self, article):
+    async def generate_summary(self, article):
         """Generate article summary using Ollama WebUI API."""
-        # Truncate content to reduce context length
-        max_content_length = 500
-        combined_content = (article['description'] + ' ' + article['content']).strip()
-        truncated_content = combined_content[:max_content_length] + ('...' if len(combined_content) > max_content_length else '')
-        
-        response = requests.post(
+        # Strip markup and cap the prompt by tokens to reduce context length
+        truncated_content = clean_and_truncate(article['description'] + ' ' + article['content'])
+        return await self.summarize_once(article['title'], truncated_content, self.request_summary)
+
+    async def request_summary(self, title, content):
+        """Ask the Ollama WebUI API to summarize an article."""
+        return await self.stream_chat_completion(
             "http://localhost:3000/api/chat/completions",
             headers={
                 "Authorization": f"Bearer {self.ollama_api_key}",
                 "Content-Type": "application/json"
             },
-            json={
+            payload={
                 "messages": [
                     {
                         "role": "system",
@@ -110,21 +40,14 @@ class RssSlackBot:
                     {
                         "role": "user",
                         "content": (
-                            f"Title: {article['title']}\n"
-                            f"Content: {truncated_content}")
+                            f"Title: {title}\n"
+                            f"Content: {content}")
                     }
                 ],
                 "model": "phi4:14b",
-                "stream": False,
                 "temperature": 0.7
             }
         )
-        
-        if response.status_code != 200:
-            raise Exception(f"Ollama API error: {response.text}")
-            
-        summary = response.json()['choices'][0]['message']['content'].strip()
-        return summary
 
     def post_to_slack(self, article, summary):
         """Post article to Slack using webhooks."""
@@ -167,7 +90,7 @@ class RssSlackBot:
         }
 
         # Send the message
-        response = requests.post(
+        response = self.session.post(
             self.webhook_url,
             json=message
         )
@@ -177,41 +100,25 @@ class RssSlackBot:
             
         return response
 
+    async def handle_article(self, article):
+        """Summarize an article and post it to Slack."""
+        summary = await self.generate_summary(article)
+        logging.info(f"Generated summary: {summary}")
+
+        await asyncio.to_thread(self.post_to_slack, article, summary)
+        logging.info("Posted to Slack successfully")
+
+        self.save_history(article['link'])
+        logging.info("Updated article history")
+
 def main():
+    setup_logging()
+
     try:
         bot = RssSlackBot()
-        interval = 30  # Post every hour
-        
-        while True:
-            try:
-                # Get random RSS feed
-                feed_url = bot.get_random_feed_url('rss_feeds.txt')
-                logging.info(f"Selected feed: {feed_url}")
-                
-                # Get latest article
-                article = bot.get_latest_article(feed_url)
-                logging.info(f"Found article: {article['title']}")
-                
-                # Generate summary
-                summary = bot.generate_summary(article)
-                logging.info(f"Generated summary: {summary}")
-                
-                # Post to Slack
-                response = bot.post_to_slack(article, summary)
-                logging.info("Posted to Slack successfully")
-                
-                # Save to history
-                bot.save_history(article['link'])
-                logging.info("Updated article history")
-                
-            except Exception as e:
-                logging.error(f"Error in main loop: {str(e)}")
-                # Continue to next iteration instead of crashing
-                
-            # Sleep for the specified interval
-            logging.info(f"Sleeping for {interval} seconds...")
-            time.sleep(interval)
-            
+        interval = 30  # Seconds between posts, doubled while feeds are quiet
+        asyncio.run(bot.run(interval))
+
     except KeyboardInterrupt:
         logging.info("Bot stopped by user")
     except Exception as e: